@@ -11,6 +11,7 @@ from mnis.mnislib import \
 	getConstituencyForMember, \
 	getPartyForMember, \
 	getServiceDataForMember, \
+	getSummaryDataForMember, \
 	getSummaryDataForMembers, \
 	saveSummaryDataForMembers, \
 	downloadMembers, \
@@ -26,6 +27,7 @@ from mnis.mnislib import \
 	get_constituency_for_member, \
 	get_party_for_member, \
 	get_service_data_for_member, \
+	get_summary_data_for_member, \
 	get_summary_data_for_members, \
 	save_summary_data_for_members, \
-	download_members \
\ No newline at end of file
+	download_members
@@ -128,4 +128,13 @@ dates['2015'] = {
 dates['2017'] = {
 	'dissolution': datetime.date(2017, 5, 3), 
 	'election': datetime.date(2017, 6, 8)
-}
\ No newline at end of file
+}
+
+# The dissolution and election dates for each election as a tuple of
+# (dissolution, election) pairs, sorted by date of dissolution
+periods = tuple(sorted( \
+	(d['dissolution'], d['election']) for d in dates.values()))
+
+# The same periods as pairs of date ordinals, for day arithmetic on integers
+ordinalPeriods = tuple( \
+	(d.toordinal(), e.toordinal()) for d, e in periods)
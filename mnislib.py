@@ -18,11 +18,39 @@ http://stackoverflow.com/questions/10112376/how-to-consume-odata-service-with-ht
 
 """
 
+import bisect
+import codecs
 import datetime
+import functools
+import hashlib
+import itertools
+import operator
+import os
+import tempfile
+import time
+import urllib.parse
 import requests
-import json
 import csv
 import mnis.housedata as housedata
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Use orjson to parse responses where it is available as it is much faster.
+# The standard library's json module only accepts bytes from Python 3.6, so
+# the response is decoded before it is parsed when orjson is not available.
+try:
+
+	import orjson as jsonParser
+
+	def parseJson(content):
+		return jsonParser.loads(content)
+
+except ImportError:
+
+	import json as jsonParser
+
+	def parseJson(content):
+		return jsonParser.loads(content.decode('utf-8'))
 
 # Package Exceptions ---------------------------------------------------------
 
@@ -44,6 +72,32 @@ class MembershipError(Error):
 	pass
 
 
+# Package HTTP session and cache ---------------------------------------------
+
+# A session shared by all requests to the API, so that connections to MNIS
+# are kept alive and reused between requests, and failed requests are retried
+session = requests.Session()
+
+sessionRetry = Retry(total=3, backoff_factor=0.3, \
+	status_forcelist=[500, 502, 503, 504])
+
+session.mount('http://', HTTPAdapter( \
+	pool_connections=4, pool_maxsize=8, max_retries=sessionRetry))
+
+session.mount('https://', HTTPAdapter( \
+	pool_connections=4, pool_maxsize=8, max_retries=sessionRetry))
+
+# The number of seconds to wait for the API before giving up on a request
+requestTimeout = 30
+
+# A directory in which to cache API responses on disk, keyed by URL, so that
+# repeated requests skip the network. Caching is off while this is None.
+cacheDirectory = None
+
+# The number of seconds for which a cached response is used
+cacheExpiry = 3600
+
+
 # Functions which return a list of members -----------------------------------
 
 def getCurrentCommonsMembers(outputParameters= \
@@ -79,8 +133,8 @@ def getCommonsMembersBetween(startDate, endDate, outputParameters= \
 	which must be instances of datetime.date.
 	"""
 
-	s = '{0}-{1}-{2}'.format(startDate.year, startDate.month, startDate.day)
-	e = '{0}-{1}-{2}'.format(endDate.year, endDate.month, endDate.day)
+	s = startDate.isoformat()
+	e = endDate.isoformat()
 	urlParameters = 'commonsmemberbetween={0}and{1}'.format(s, e)
 
 	return getCommonsMembers(urlParameters, outputParameters)
@@ -89,6 +143,11 @@ def getCommonsMembersBetween(startDate, endDate, outputParameters= \
 get_commons_members_between = getCommonsMembersBetween
 
 
+# The ids of general elections for which MNIS holds complete data
+validElectionIds = frozenset([ \
+	'1983', '1987', '1992', '1997', '2001', '2005', '2010', '2015', '2017'])
+
+
 def getCommonsMembersAtElection(generalElectionId, outputParameters= \
 	['Constituencies', 'Parties', 'HouseMemberships']):
 
@@ -96,17 +155,14 @@ def getCommonsMembersAtElection(generalElectionId, outputParameters= \
 	Returns all Commons members elected at a given general election.
 	The MNIS system holds complete data on general elections since 1983.
 	The generalElectionId must be one of the following strings: 1983, 1987,
-	1992, 1997, 2001, 2005, 2010, 2015.
+	1992, 1997, 2001, 2005, 2010, 2015, 2017.
 	"""
 
-	validElectionIds = [ \
-		'1983', '1987', '1992', '1997', '2001', '2005', '2010', '2015', '2017']
-
 	if generalElectionId not in validElectionIds:
 		raise ElectionIdError("Invalid id in getCommonsMembersAtElection")
 
-	urlParameters = 'returnedatelection={0}' \
-		'%20General%20Election'.format(generalElectionId)
+	urlParameters = 'returnedatelection={0}'.format( \
+		urllib.parse.quote('{0} General Election'.format(generalElectionId)))
 
 	return getCommonsMembers(urlParameters, outputParameters)
 
@@ -136,6 +192,79 @@ def buildMnisUrl(urlParameters, outputParameters):
 build_mnis_url = buildMnisUrl
 
 
+def getMnisData(url):
+
+	"""
+	Returns the body of the API response for the given URL parsed as JSON,
+	with any byte order marker removed before it is parsed. If
+	cacheDirectory is set, successful responses that parse as JSON are
+	saved in that directory, and a saved response younger than cacheExpiry
+	seconds is returned instead of making a request.
+	"""
+
+	# Return the cached response for the URL if there is a fresh one
+	cachePath = None
+
+	if cacheDirectory is not None:
+
+		cacheName = hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json'
+		cachePath = os.path.join(cacheDirectory, cacheName)
+
+		if os.path.exists(cachePath) and \
+			time.time() - os.path.getmtime(cachePath) < cacheExpiry:
+
+			with open(cachePath, 'rb') as cacheFile:
+				cacheContent = cacheFile.read()
+
+			# Request the data again if the cached response does not parse
+			try:
+				return parseJson(cacheContent)
+			except ValueError:
+				pass
+
+	# Set http request parameters
+	headers = {'content-type': 'application/json'}
+
+	# Make request
+	response = session.get(url, headers=headers, timeout=requestTimeout)
+
+	# Get the raw bytes to avoid decoding the response to a string
+	responseContent = response.content
+
+	# Handle byte order marker
+	if responseContent.startswith(codecs.BOM_UTF8):
+		responseContent = responseContent[len(codecs.BOM_UTF8):]
+
+	# Parse as JSON, which raises an error for a response that is not JSON,
+	# so only responses that parse are saved to the cache
+	data = parseJson(responseContent)
+
+	# Save the response to the cache, writing it to a temporary file first so
+	# that a partly written response is never used
+	if cachePath is not None and response.ok:
+
+		os.makedirs(cacheDirectory, exist_ok=True)
+
+		cacheHandle, tempPath = tempfile.mkstemp(dir=cacheDirectory)
+
+		try:
+
+			with open(cacheHandle, 'wb') as cacheFile:
+				cacheFile.write(responseContent)
+
+			os.replace(tempPath, cachePath)
+
+		except BaseException:
+
+			os.remove(tempPath)
+			raise
+
+	return data
+
+
+get_mnis_data = getMnisData
+
+
 def getCommonsMembers(urlParameters, outputParameters= \
 	['Constituencies', 'Parties', 'HouseMemberships']):
 
@@ -147,18 +276,8 @@ def getCommonsMembers(urlParameters, outputParameters= \
 	output parameters per request.
 	"""
 
-	# Set http request parameters
-	headers = {'content-type': 'application/json'}
 	url = buildMnisUrl(urlParameters, outputParameters)
-
-	# Make request
-	response = requests.get(url, headers=headers)
-
-	# Handle byte order marker
-	response.encoding = 'utf-8-sig'
-
-	# Parse as JSON
-	members = response.json()
+	members = getMnisData(url)
 
 	# Extract member data
 	members = members['Members']['Member']
@@ -222,7 +341,7 @@ def getDateOfBirthForMember(member):
 get_date_of_birth_for_member = getDateOfBirthForMember
 
 
-def getConstituencyForMember(member, onDate):
+def getConstituencyForMember(member, onDate, today=None):
 
 	"""
 	Returns a member's constituency on a given date. If the member was not an
@@ -231,38 +350,27 @@ def getConstituencyForMember(member, onDate):
 	returned by one of the getCommonsMembers functions, and must contain data
 	on constituency memberships which is requested with the output parameter
 	for 'Constituencies'. This parameter is one of the defaults for the
-	getCommonsMembers functions. The onDate should be a datetime.date.
+	getCommonsMembers functions. The onDate should be a datetime.date. Today's
+	date can optionally be passed as a datetime.date for checking open
+	memberships, so it is only read once when summarising many members.
 	"""
 
 	# Get the data on historic constituency memberships
-	constituencyMembership = member['Constituencies']['Constituency']
-	constituencyName = 'Not serving on {0}'.format(onDate)
-
-	# Constituency memberships are in a list if there is more than one
-	if isinstance(constituencyMembership, list):
+	constituencyMemberships = getMembershipList( \
+		member['Constituencies']['Constituency'])
 
-		for membership in constituencyMembership:
+	for membership in constituencyMemberships:
 
-			if isDateInMembership(membership, onDate):
+		if isDateInMembership(membership, onDate, today):
+			return membership['Name']
 
-				constituencyName = membership['Name']
-				break
-
-	# Otherwise the membership is accessed directly
-	else:
-
-		membership = constituencyMembership
-
-		if isDateInMembership(membership, onDate):
-			constituencyName = membership['Name']
-
-	return constituencyName
+	return 'Not serving on {0}'.format(onDate)
 
 
 get_constituency_for_member = getConstituencyForMember
 
 
-def getPartyForMember(member, onDate):
+def getPartyForMember(member, onDate, today=None):
 
 	"""
 	Returns a member's party on a given date. If the member was not an MP on
@@ -271,52 +379,49 @@ def getPartyForMember(member, onDate):
 	by one of the getCommonsMembers functions, and must contain data on party
 	memberships which is requested with the output parameter for 'Parties'.
 	This parameter is one of the defaults for the getCommonsMembers functions.
-	The onDate should be a datetime.date.
+	The onDate should be a datetime.date. Today's date can optionally be
+	passed as a datetime.date for checking open memberships, so it is only
+	read once when summarising many members.
 	"""
 
 	# Get the data on historic party memberships
-	partyMembership = member['Parties']['Party']
-	partyName = 'Not serving on {0}'.format(onDate)
-
-	# Party memberships are in a list if there is more than one
-	if isinstance(partyMembership, list):
+	partyMemberships = getMembershipList(member['Parties']['Party'])
 
-		for membership in partyMembership:
+	for membership in partyMemberships:
 
-			if isDateInMembership(membership, onDate):
+		if isDateInMembership(membership, onDate, today):
+			return membership['Name']
 
-				partyName = membership['Name']
-				break
-
-	# Otherwise the membership is accessed directly
-	else:
-
-		membership = partyMembership
-
-		if isDateInMembership(membership, onDate):
-			partyName = membership['Name']
-
-	return partyName
+	return 'Not serving on {0}'.format(onDate)
 
 
 get_party_for_member = getPartyForMember
 
 
-def isDateInMembership(membership, onDate):
+def isDateInMembership(membership, onDate, today=None):
 
-	""" Checks whether a date falls within a given membership. """
+	"""
+	Checks whether a date falls within a given membership. Open memberships
+	are treated as ending on today's date. Callers checking many memberships
+	can pass today as a datetime.date to avoid reading the clock each time.
+	"""
 
 	# Set the start date to the membership start date
 	startDate = convertMnisDatetime(membership['StartDate'])
 
 	# Assume the membership is open and set the end date to today's date
-	endDate = datetime.date.today()
+	endDate = today or datetime.date.today()
 
 	# If the membership is closed set the end date to the membership end date
 	if isinstance(membership['EndDate'], str):
 		endDate = convertMnisDatetime(membership['EndDate'])
 
-	return isDateInRange(onDate, startDate, endDate)
+	# Check the range inline rather than calling isDateInRange
+	if startDate > endDate:
+		raise MembershipError( \
+			"startDate later than endDate in isDateInMembership")
+
+	return startDate <= onDate <= endDate
 
 
 is_date_in_membership = isDateInMembership
@@ -335,33 +440,19 @@ def getServiceDataForMember(member, onDate):
 	"""
 
 	# Get Commons memberships to calculate length of service in days
-	houseMembership = member['HouseMemberships']['HouseMembership']
+	houseMemberships = getMembershipList( \
+		member['HouseMemberships']['HouseMembership'])
 	serviceDays = 0
 	startDates = []
 
-	# House memberships are in a list if there is more than one
-	if isinstance(houseMembership, list):
-
-		for membership in houseMembership:
-
-			if membership['House'] == 'Commons':
+	for membership in houseMemberships:
 
-				daysService = getMembershipDays(membership, onDate)
-				serviceDays += daysService
-				startDates.append(convertMnisDatetime(membership['StartDate']))
+		if membership['House'] == 'Commons':
 
-	# Otherwise the membership is accessed directly
-	else:
-
-		if houseMembership['House'] == 'Commons':
-
-			membership = houseMembership
-			daysService = getMembershipDays(membership, onDate)
-			serviceDays += daysService
+			serviceDays += getMembershipDays(membership, onDate)
 			startDates.append(convertMnisDatetime(membership['StartDate']))
 
-	startDates.sort()
-	startDate = startDates[0]
+	startDate = min(startDates)
 
 	return startDate, serviceDays
 
@@ -374,100 +465,123 @@ def getMembershipDays(membership, onDate, houseDates=housedata.dates):
 	"""
 	Returns the number of days service in a membership up to the given date,
 	excluding periods when the House is in dissolution. The onDate is a
-	datetime.date.
+	datetime.date. The houseDates are the dissolution and election dates for
+	each election, in the form of housedata.dates.
 	"""
 
+	# Get the dissolution periods as pairs of date ordinals, using the pairs
+	# precomputed in housedata for the default house dates
+	if houseDates is housedata.dates:
+		housePeriods = housedata.ordinalPeriods
+	else:
+		housePeriods = getOrdinalPeriods(houseDates)
+
+	# Work with date ordinals so day arithmetic is done on integers
+	onOrdinal = onDate.toordinal()
+
 	# Set the start date to the membership start date
-	startDate = convertMnisDatetime(membership['StartDate'])
+	startOrdinal = convertMnisDatetime(membership['StartDate']).toordinal()
 
 	# Assume the membership is open and set the end date to the onDate
-	endDate = onDate
+	endOrdinal = onOrdinal
 
 	# If the membership is closed set the end date to the membership end date
 	if isinstance(membership['EndDate'], str):
-		endDate = convertMnisDatetime(membership['EndDate'])
+		endOrdinal = convertMnisDatetime(membership['EndDate']).toordinal()
 
 	# If the membership starts on or after the onDate return zero days
-	if startDate >= onDate: return 0
+	if startOrdinal >= onOrdinal: return 0
 
 	# If the membership ends after the onDate set it to the onDate
-	if endDate > onDate: endDate = onDate
+	if endOrdinal > onOrdinal: endOrdinal = onOrdinal
 
 	# If membership ends before it starts raise an error
-	if startDate > endDate:
+	if startOrdinal > endOrdinal:
 		raise MembershipError("startDate after endDate in getMembershipDays")
 
 	# Set initial service length as the number of days from start to end
-	serviceDelta = endDate - startDate
-	serviceDays = serviceDelta.days
+	serviceDays = endOrdinal - startOrdinal
 
 	# Then remove dissolution periods that fall within the membership
-	elections = sorted(houseDates.keys())
+	serviceDays -= getDissolutionDays(startOrdinal, endOrdinal, housePeriods)
 
-	for e in elections:
+	return serviceDays
 
-		election = houseDates[e]['election']
-		dissolution = houseDates[e]['dissolution']
 
-		if dissolution >= startDate:
+get_membership_days = getMembershipDays
 
-			if dissolution < endDate:
 
-				if election <= endDate:
+def getDissolutionDays(startOrdinal, endOrdinal, housePeriods):
 
-					# remove entire dissolution and continue
-					delta = election - dissolution
-					serviceDays -= delta.days
-					continue
+	"""
+	Returns the number of days between two date ordinals that fall within
+	periods when the House is in dissolution. The housePeriods are pairs of
+	dissolution and election date ordinals sorted by date of dissolution.
+	"""
 
-				else:
+	dissolutionDays = 0
 
-					# remove endDate - dissolution
-					delta = endDate - dissolution
-					serviceDays -= delta.days
-					continue
-			else:
+	# Periods are sorted so only those from the last dissolution before the
+	# start of the range up to the last dissolution before its end can overlap
+	first = max(bisect.bisect_left(housePeriods, (startOrdinal,)) - 1, 0)
+	last = bisect.bisect_left(housePeriods, (endOrdinal,))
 
-				# dissolution is after membership so do nothing
-				pass
+	for dissolution, election in housePeriods[first:last]:
 
-		elif dissolution < startDate:
+		# The overlap runs from the later of the dissolution and the start of
+		# the range to the earlier of the election and the end of the range,
+		# and is empty if the election is before the start
+		overlap = min(election, endOrdinal) - max(dissolution, startOrdinal)
 
-			if election > startDate:
+		if overlap > 0:
+			dissolutionDays += overlap
 
-				if election <= endDate:
+	return dissolutionDays
 
-					# remove election - startDate
-					delta = election - startDate
-					serviceDays -= delta.days
-					continue
 
-				else:
+get_dissolution_days = getDissolutionDays
 
-					# remove whole membership and continue
-					delta = endDate - startDate
-					serviceDays -= delta.days
-					continue
 
-			else:
+# Functions for summarising data on a list of members ------------------------
 
-					# election is before membership so do nothing
-					pass
+# The fields in the summary data for each member, in the order they are saved
+summaryFields = ('member_id', 'list_name', 'constituency', 'party', \
+	'date_of_birth', 'gender', 'first_start_date', 'days_service')
 
-		else:
 
-			# This should not be able to happen
-			raise MembershipError("Shouldn't happen in getMembershipDays")
+def getSummaryDataForMember(member, onDate, today=None):
 
-	return serviceDays
+	"""
+	Takes a member and returns a set of summary data for the member as a
+	dictionary. The data returned is determined by the onDate, which should
+	be a datetime.date. See getSummaryDataForMembers for the data returned
+	and the output parameters the member must have been requested with.
+	Today's date can optionally be passed as a datetime.date for use when
+	checking open memberships, so it is only read once for many members.
+	"""
 
+	today = today or datetime.date.today()
 
-get_membership_days = getMembershipDays
+	startDate, serviceDays = getServiceDataForMember(member, onDate)
 
+	memberData = {
+		'member_id': getIdForMember(member),
+		'list_name': getListNameForMember(member),
+		'constituency': getConstituencyForMember(member, onDate, today),
+		'party': getPartyForMember(member, onDate, today),
+		'date_of_birth': getDateOfBirthForMember(member),
+		'gender': getGenderForMember(member),
+		'first_start_date': startDate,
+		'days_service': serviceDays
+	}
 
-# Functions for summarising data on a list of members ------------------------
+	return memberData
 
-def getSummaryDataForMembers(members, onDate):
+
+get_summary_data_for_member = getSummaryDataForMember
+
+
+def getSummaryDataForMembers(members, onDate, executor=None):
 
 	"""
 	Takes a list of members, produces a set of summary data for each member
@@ -492,22 +606,24 @@ def getSummaryDataForMembers(members, onDate):
 	- HouseMemberships
 
 	These are the default output parameters for getCommonsMembers functions.
+
+	Members are summarised independently of one another, so an executor from
+	the concurrent.futures module can optionally be passed to summarise them
+	with its map method. Summarising a member only takes microseconds, so for
+	a single download the cost of handing members to an executor's workers
+	is usually greater than the time saved, and the default is to summarise
+	the members in turn.
 	"""
 
-	summary = []
+	# Get today's date once for checking open memberships
+	today = datetime.date.today()
 
-	for member in members:
+	if executor is not None:
 
-		memberData = {}
-		memberData['member_id']	= getIdForMember(member)
-		memberData['list_name'] = getListNameForMember(member)
-		memberData['constituency'] = getConstituencyForMember(member, onDate)
-		memberData['party'] = getPartyForMember(member, onDate)
-		memberData['date_of_birth'] = getDateOfBirthForMember(member)
-		memberData['gender'] = getGenderForMember(member)
-		memberData['first_start_date'], memberData['days_service'] = \
-			getServiceDataForMember(member, onDate)
-		summary.append(memberData)
+		return list(executor.map(getSummaryDataForMember, members, \
+			itertools.repeat(onDate), itertools.repeat(today)))
+
+	summary = [getSummaryDataForMember(m, onDate, today) for m in members]
 
 	return summary
 
@@ -519,8 +635,9 @@ def saveSummaryDataForMembers(summaryData, csvName):
 
 	"""
 	Takes a list of summary data for each member from getSummaryDataForMembers
-	and writes the data to file as a csv with the given filename. The data
-	downloaded for each member is:
+	and writes the data to file as a csv with the given filename. Any iterable
+	of summary data can be passed, such as a generator of the results of
+	getSummaryDataForMember. The data downloaded for each member is:
 
 	- member id
 	- listed name
@@ -539,18 +656,39 @@ def saveSummaryDataForMembers(summaryData, csvName):
 	- HouseMemberships
 
 	These are the default output parameters for getCommonsMembers functions.
+
+	The csv is written to a temporary file in the same directory as csvName,
+	which replaces csvName once every row has been written. If producing the
+	summary data raises an error, the temporary file is removed and any
+	existing file with the given filename is left unchanged.
 	"""
 
-	with open(csvName, 'w', newline='') as csvFile:
+	csvHandle, tempName = tempfile.mkstemp( \
+		dir=os.path.dirname(csvName) or '.', suffix='.csv')
+
+	try:
+
+		with open(csvHandle, 'w', newline='') as csvFile:
+
+			# Write each summary as a row of its values in the field order
+			getRow = operator.itemgetter(*summaryFields)
+
+			writer = csv.writer(csvFile)
+			writer.writerow(summaryFields)
+			writer.writerows(map(getRow, summaryData))
+
+		# Files made by mkstemp can only be read by their owner, so give the
+		# csv the permissions of a file created with open
+		umask = os.umask(0)
+		os.umask(umask)
+		os.chmod(tempName, 0o666 & ~umask)
 
-		fieldnames = ['member_id', 'list_name', 'constituency', 'party', \
-			'date_of_birth', 'gender', 'first_start_date', 'days_service']
+		os.replace(tempName, csvName)
 
-		writer = csv.DictWriter(csvFile, fieldnames=fieldnames)
-		writer.writeheader()
+	except BaseException:
 
-		for summary in summaryData:
-			writer.writerow(summary)
+		os.remove(tempName)
+		raise
 
 
 save_summary_data_for_members = saveSummaryDataForMembers
@@ -578,7 +716,12 @@ def downloadMembers(onDate, csvName):
 	"""
 
 	members = getCommonsMembersOn(onDate)
-	summaryData = getSummaryDataForMembers(members, onDate)
+
+	# Write each member's summary data as it is produced rather than holding
+	# the summary data for all members in memory. The csv is only replaced
+	# once the summary data for every member has been written.
+	today = datetime.date.today()
+	summaryData = (getSummaryDataForMember(m, onDate, today) for m in members)
 	saveSummaryDataForMembers(summaryData, csvName)
 
 
@@ -587,15 +730,66 @@ download_members = downloadMembers
 
 # Utility functions ----------------------------------------------------------
 
+def getMembershipList(memberships):
+
+	"""
+	Takes the memberships of a given type for a member and returns them as a
+	list. The API returns a single membership as a dictionary rather than as
+	a list containing one membership.
+	"""
+
+	if isinstance(memberships, list):
+		return memberships
+	else:
+		return [memberships]
+
+
+get_membership_list = getMembershipList
+
+
+def getOrdinalPeriods(houseDates):
+
+	"""
+	Takes the dissolution and election dates for each election, in the form
+	of housedata.dates, and returns them as a tuple of pairs of dissolution
+	and election date ordinals, sorted by date of dissolution.
+	"""
+
+	return tuple(sorted((d['dissolution'].toordinal(), \
+		d['election'].toordinal()) for d in houseDates.values()))
+
+
+get_ordinal_periods = getOrdinalPeriods
+
+
+@functools.lru_cache(maxsize=4096)
 def convertMnisDatetime(mnisDatetime):
 
 	"""
 	Takes a string representing a datetime in MNIS data and returns it
-	as a datetime.date.
+	as a datetime.date. Results are cached as the same dates recur across
+	the memberships of many members.
 	"""
 
-	mnisDate = mnisDatetime[:10]
-	convertedDate = datetime.datetime.strptime(mnisDate, '%Y-%m-%d').date()
+	# MNIS datetimes begin with a date in the form YYYY-MM-DD, so the parts
+	# of the date are sliced out directly rather than using strptime. Each
+	# part is checked to be digits, as int also accepts signs, spaces and
+	# underscores that strptime would reject.
+	if len(mnisDatetime) >= 10 and \
+		mnisDatetime[4] == '-' and mnisDatetime[7] == '-' and \
+		mnisDatetime[0:4].isdigit() and mnisDatetime[5:7].isdigit() and \
+		mnisDatetime[8:10].isdigit():
+
+		convertedDate = datetime.date(int(mnisDatetime[0:4]), \
+			int(mnisDatetime[5:7]), int(mnisDatetime[8:10]))
+
+	# Otherwise fall back to strptime, which raises an error for bad input
+	else:
+
+		mnisDate = mnisDatetime[:10]
+		convertedDate = \
+			datetime.datetime.strptime(mnisDate, '%Y-%m-%d').date()
+
 	return convertedDate
 
 
@@ -613,10 +807,7 @@ def isDateInRange(onDate, startDate, endDate):
 	if startDate > endDate:
 		raise MembershipError("startDate later than endDate in isDateInRange")
 
-	if onDate >= startDate and onDate <= endDate:
-		return True
-	else:
-		return False
+	return startDate <= onDate <= endDate
 
 
 is_date_in_range = isDateInRange
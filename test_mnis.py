@@ -3,14 +3,83 @@
 
 import unittest
 import datetime
-import requests
 import json
 import os
 import csv
+import time
+import concurrent.futures
+import functools
+import tempfile
+import shutil
 import mnis.mnislib as mnislib
 
-print("Running tests: Note that the tests require two downloads and can take up to 20 seconds ...")
+# The dates of general elections used as onDates throughout the tests
+GE2001 = datetime.date(2001, 6, 7)
+GE2010 = datetime.date(2010, 5, 6)
+GE2015 = datetime.date(2015, 5, 7)
 
+# The file in which downloaded test data is cached between test runs. The
+# cache is refreshed when it is older than testDataMaxAge seconds, or when
+# the MNIS_REFRESH_CACHE environment variable is set to 1.
+testDataPath = os.path.join( \
+	os.path.dirname(os.path.abspath(__file__)), 'test_mnis_data.json')
+
+testDataMaxAge = 7 * 24 * 60 * 60
+
+
+def cacheTestData(path, maxAge):
+
+	"""
+	Returns a decorator that caches the result of a function which downloads
+	test data as json in the file at the given path. The cached data is
+	returned instead of calling the function unless the file is older than
+	maxAge seconds, cannot be parsed, or a refresh is forced with
+	MNIS_REFRESH_CACHE=1. The data is written to a temporary file which then
+	replaces the cache, so an interrupted or concurrent write never leaves a
+	partial cache. The undecorated function is available as __wrapped__.
+	"""
+
+	def decorator(download):
+
+		@functools.wraps(download)
+		def cachedDownload():
+
+			refresh = os.environ.get('MNIS_REFRESH_CACHE') == '1'
+
+			if not refresh and os.path.exists(path) and \
+				time.time() - os.path.getmtime(path) < maxAge:
+
+				try:
+					with open(path) as cacheFile:
+						return json.load(cacheFile)
+				except ValueError:
+					pass
+
+			data = download()
+
+			cacheHandle, tempPath = tempfile.mkstemp( \
+				dir=os.path.dirname(path), suffix='.json')
+
+			try:
+
+				with open(cacheHandle, 'w') as cacheFile:
+					json.dump(data, cacheFile)
+
+				os.replace(tempPath, path)
+
+			except BaseException:
+
+				os.remove(tempPath)
+				raise
+
+			return data
+
+		return cachedDownload
+
+	return decorator
+
+
+@cacheTestData(testDataPath, testDataMaxAge)
 def downloadMembersForTesting():
 
 	"""Downloads data using a fixed URL for testing against library output."""
@@ -22,14 +91,15 @@ def downloadMembersForTesting():
 		'commonsmemberbetween=2015-05-07and2015-05-07/Constituencies|' \
 		'Parties|HouseMemberships'
 
-	# Make request
-	response = requests.get(url, headers=headers)
-	
-	# Get response text
-	responseText = response.text
-	
-	# Parse JSON (cutting off the byte order marker at the start)
-	members = json.loads(responseText[1:])
+	# Make request with the library's session so the connection is reused
+	response = mnislib.session.get( \
+		url, headers=headers, timeout=mnislib.requestTimeout)
+
+	# Handle byte order marker
+	response.encoding = 'utf-8-sig'
+
+	# Parse JSON
+	members = response.json()
 	members = members['Members']['Member']
 
 	# Sort members to ensure they appear in list name alphabetical order
@@ -38,9 +108,85 @@ def downloadMembersForTesting():
 	return members
 
 
-# A global module variable used to store downloaded data on members. This data 
-# is used for testing functions that work with downloaded data.
-correctMembers = downloadMembersForTesting() 
+# Global module variables used to store downloaded data on members. This data
+# is used for testing functions that work with downloaded data, and is only
+# downloaded when a test that needs it is run.
+correctMembers = None
+correctMembersByName = None
+testDataError = None
+
+
+def loadTestData():
+
+	"""
+	Downloads the test data the first time it is called and stores it in
+	the module's global variables. If the download fails the error is kept
+	and later calls raise an error from it, so the download is only tried
+	once.
+	"""
+
+	global correctMembers, correctMembersByName, testDataError
+
+	if correctMembers is not None: return
+	if testDataError is not None:
+		raise RuntimeError("The test data could not be downloaded") \
+			from testDataError
+
+	print("Downloading test data: Note that this can take up to 20 " \
+		"seconds if the cached test data is out of date ...")
+
+	try:
+		members = downloadMembersForTesting()
+	except Exception as e:
+		testDataError = e
+		raise
+
+	correctMembers = members
+
+	# The same members keyed by list name, so tests can refer to members by
+	# name rather than by their position in the list
+	correctMembersByName = {m['ListAs']: m for m in correctMembers}
+
+
+def findCorrectMember(surname, forename):
+
+	"""
+	Returns the member in the test data with the given surname and forename.
+	Members are matched on the surname at the start of their list name and
+	the forename at its end, so the match does not depend on whether the
+	list name includes a title.
+	"""
+
+	matches = [m for m in correctMembers \
+		if m['ListAs'].startswith(surname + ', ') and \
+		m['ListAs'].endswith(' ' + forename)]
+
+	if len(matches) != 1:
+		raise LookupError("Expected one member named {0} {1} in the test " \
+			"data but found {2}".format(forename, surname, len(matches)))
+
+	return matches[0]
+
+
+# Set the MNIS_NO_NETWORK environment variable to 1 to skip the integration
+# tests that need downloaded data and run only the tests that work offline.
+skipNetworkTests = os.environ.get('MNIS_NO_NETWORK') == '1'
+
+
+@unittest.skipIf(skipNetworkTests, "MNIS_NO_NETWORK is set")
+class downloadedDataTestCase(unittest.TestCase):
+
+	"""
+	A base class for integration tests that use the downloaded test data.
+	The data is loaded before the first of these test classes is run, so
+	running only tests that do not need the data makes no downloads. These
+	tests are skipped when MNIS_NO_NETWORK=1.
+	"""
+
+	@classmethod
+	def setUpClass(cls):
+
+		loadTestData()
 
 
 def mockGetCommonsMembers(urlParameters, outputParameters):
@@ -55,27 +201,46 @@ def mockGetCommonsMembers(urlParameters, outputParameters):
 	return urlParameters, outputParameters
 
 
-class testGetCurrentCommonsMembers(unittest.TestCase):
+class mockGetCommonsMembersTestCase(unittest.TestCase):
 
 	"""
-	Tests getCurrentCommonsMembers by mocking getCommonsMembers
-	and checking that the parameters passed to it are correct.
+	A base class for tests of the functions that wrap getCommonsMembers.
+	It replaces getCommonsMembers with mockGetCommonsMembers once for each
+	test class and restores it when the tests in the class are finished.
 	"""
 
-	def setUp(self):
+	@classmethod
+	def setUpClass(cls):
 
-		self.realGetCommonsMembers = mnislib.getCommonsMembers
+		cls.realGetCommonsMembers = mnislib.getCommonsMembers
 		mnislib.getCommonsMembers = mockGetCommonsMembers
 
-	def tearDown(self):
+	@classmethod
+	def tearDownClass(cls):
+
+		mnislib.getCommonsMembers = cls.realGetCommonsMembers
+
+
+class testGetCurrentCommonsMembers(mockGetCommonsMembersTestCase):
+
+	"""
+	Tests getCurrentCommonsMembers by mocking getCommonsMembers
+	and checking that the parameters passed to it are correct.
+	"""
+
+	@classmethod
+	def setUpClass(cls):
+
+		super().setUpClass()
 
-		mnislib.getCommonsMembers = self.realGetCommonsMembers
+		# Get today's date and the expected parameters once for the class
+		cls.today = datetime.date.today()
+		ds = cls.today.isoformat()
+		cls.urlParameters = 'commonsmemberbetween={0}and{1}'.format(ds, ds)
 
 	def testGetCurrentCommonsMembers(self):
 
-		d = datetime.date.today()
-		ds = '{0}-{1}-{2}'.format(d.year, d.month, d.day)
-		urlParameters = 'commonsmemberbetween={0}and{1}'.format(ds, ds)
+		urlParameters = self.urlParameters
 		outputParameters = ['Constituencies', 'Parties', 'HouseMemberships']
 
 		# Test with the default output parameters
@@ -89,29 +254,27 @@ class testGetCurrentCommonsMembers(unittest.TestCase):
 		self.assertEqual(op, ['Parameter'])
 
 
-class testGetCommonsMembersOn(unittest.TestCase):
+class testGetCommonsMembersOn(mockGetCommonsMembersTestCase):
 
 	"""
 	Tests getCommonsMembersOn by mocking getCommonsMembers
 	and checking that the parameters passed to it are correct.
 	"""
 
-	def setUp(self):
-
-		self.realGetCommonsMembers = mnislib.getCommonsMembers
-		mnislib.getCommonsMembers = mockGetCommonsMembers
-
-
-	def tearDown(self):
+	@classmethod
+	def setUpClass(cls):
 
-		mnislib.getCommonsMembers = self.realGetCommonsMembers
+		super().setUpClass()
 
+		# Get today's date and the expected parameters once for the class
+		cls.today = datetime.date.today()
+		ds = cls.today.isoformat()
+		cls.urlParameters = 'commonsmemberbetween={0}and{1}'.format(ds, ds)
 
 	def testGetCommonsMembersOn(self):
 
-		d = datetime.date.today()
-		ds = '{0}-{1}-{2}'.format(d.year, d.month, d.day)
-		urlParameters = 'commonsmemberbetween={0}and{1}'.format(ds, ds)
+		d = self.today
+		urlParameters = self.urlParameters
 		outputParameters = ['Constituencies', 'Parties', 'HouseMemberships']
 
 		# Test with the default output parameters
@@ -125,30 +288,19 @@ class testGetCommonsMembersOn(unittest.TestCase):
 		self.assertEqual(op, ['Parameter'])
 
 
-class testGetCommonsMembersBetween(unittest.TestCase):
+class testGetCommonsMembersBetween(mockGetCommonsMembersTestCase):
 
 	"""
 	Tests getCommonsMembersBetween by mocking getCommonsMembers
 	and checking that the parameters passed to it are correct.
 	"""
 
-	def setUp(self):
-
-		self.realGetCommonsMembers = mnislib.getCommonsMembers
-		mnislib.getCommonsMembers = mockGetCommonsMembers
-
-
-	def tearDown(self):
-
-		mnislib.getCommonsMembers = self.realGetCommonsMembers
-
-
 	def testGetCommonsMembersBetween(self):
 
 		ed = datetime.date.today()
-		eds = '{0}-{1}-{2}'.format(ed.year, ed.month, ed.day)
+		eds = ed.isoformat()
 		sd = ed - datetime.timedelta(days=1)
-		sds = '{0}-{1}-{2}'.format(sd.year, sd.month, sd.day)
+		sds = sd.isoformat()
 		urlParameters = 'commonsmemberbetween={0}and{1}'.format(sds, eds)
 		outputParameters = ['Constituencies', 'Parties', 'HouseMemberships']
 		
@@ -163,52 +315,46 @@ class testGetCommonsMembersBetween(unittest.TestCase):
 		self.assertEqual(op, ['Parameter'])
 
 
-class testGetCommonsMembersAtElection(unittest.TestCase):
+class testGetCommonsMembersAtElection(mockGetCommonsMembersTestCase):
 
 	"""
 	Tests getCommonsMembersAtElection by mocking getCommonsMembers
 	and checking that the parameters passed to it are correct.
 	"""
 
-	def setUp(self):
-
-		self.realGetCommonsMembers = mnislib.getCommonsMembers
-		mnislib.getCommonsMembers = mockGetCommonsMembers
-
-
-	def tearDown(self):
-
-		mnislib.getCommonsMembers = self.realGetCommonsMembers
-
-
 	def testGetCommonsMembersAtElection(self):
 
 		electionIds = [ \
-			'1983', '1987', '1992', '1997', '2001', '2005', '2010', '2015']
+			'1983', '1987', '1992', '1997', '2001', '2005', '2010', '2015', \
+			'2017']
 		
 		outputParameters = ['Constituencies', 'Parties', 'HouseMemberships']
 
+		# Check each election id as a separate subtest so that a failure for
+		# one id is reported without stopping the checks for the others
 		for electionId in electionIds:
 
-			urlParameters = 'returnedatelection={0}' \
-				'%20General%20Election'.format(electionId)
+			with self.subTest(electionId=electionId):
 
-			# Test with the default output parameters
-			up, op = mnislib.getCommonsMembersAtElection(electionId)
-			self.assertEqual(up, urlParameters)
-			self.assertEqual(op, outputParameters)
+				urlParameters = 'returnedatelection={0}' \
+					'%20General%20Election'.format(electionId)
 
-			# Test with user defined output parameters
-			up, op = mnislib.getCommonsMembersAtElection( \
-				electionId, ['Parameter'])
-			self.assertEqual(up, urlParameters)
-			self.assertEqual(op, ['Parameter'])
+				# Test with the default output parameters
+				up, op = mnislib.getCommonsMembersAtElection(electionId)
+				self.assertEqual(up, urlParameters)
+				self.assertEqual(op, outputParameters)
+
+				# Test with user defined output parameters
+				up, op = mnislib.getCommonsMembersAtElection( \
+					electionId, ['Parameter'])
+				self.assertEqual(up, urlParameters)
+				self.assertEqual(op, ['Parameter'])
 
 
 	def testCommonsMembersAtElectionFails(self):
 
-		self.assertRaises(mnislib.ElectionIdError, \
-			mnislib.getCommonsMembersAtElection, '1979')
+		with self.assertRaises(mnislib.ElectionIdError):
+			mnislib.getCommonsMembersAtElection('1979')
 
 
 class testBuildMnisUrl(unittest.TestCase):
@@ -252,145 +398,286 @@ class testBuildMnisUrl(unittest.TestCase):
 	def testBuildMnisUrlFails(self):
 
 		# Test buildMnisUrl fails with more than three output parameters
-		self.assertRaises(mnislib.ParameterError, mnislib.buildMnisUrl, '', \
-			['ParameterA', 'ParameterB', 'ParameterC', 'ParameterD'])
+		with self.assertRaises(mnislib.ParameterError):
+			mnislib.buildMnisUrl('', \
+				['ParameterA', 'ParameterB', 'ParameterC', 'ParameterD'])
 
 
-class testGetCommonsMembers(unittest.TestCase):
+class testGetCommonsMembers(downloadedDataTestCase):
 
 	"""
 	Tests getCommonsMebers to check it properly downloads data from the MNIS
-	API. The returned members are stored in a global variable and are used
-	in subsequent tests to check functions which handle the returned data.
+	API. The returned members are compared with a fresh download of the test
+	data rather than the cached test data, which may be up to a week old,
+	so that changes made to member records by MNIS do not fail the test. The
+	two downloads are started together so that they overlap.
 	"""
 
-	def testGetCommonsMembers(self):
-		
-		# Get Commons members at GE2015		
-		members = mnislib.getCommonsMembers( \
+	@classmethod
+	def setUpClass(cls):
+
+		downloadExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+		# Get Commons members at GE2015
+		cls.membersFuture = downloadExecutor.submit( \
+			mnislib.getCommonsMembers, \
 			'commonsmemberbetween=2015-05-07and2015-05-07', \
 			['Constituencies', 'Parties', 'HouseMemberships'])
 
-		# Sort members to ensure they appear in list name alphabetical order
-		members.sort(key=lambda member: member['ListAs'])
+		# Download the test data without using the cache
+		cls.correctMembersFuture = downloadExecutor.submit( \
+			downloadMembersForTesting.__wrapped__)
+
+		downloadExecutor.shutdown(wait=False)
+
+	def testGetCommonsMembers(self):
+
+		members = self.membersFuture.result()
+		correctMembers = self.correctMembersFuture.result()
+
+		# Key members by id so the data can be compared without sorting it
+		membersById = {mnislib.getIdForMember(m): m for m in members}
+		correctMembersById = \
+			{mnislib.getIdForMember(m): m for m in correctMembers}
 
 		# Test the downloaded data is correct
-		self.assertEqual(members, correctMembers)
+		self.assertEqual(len(members), len(correctMembers))
+		self.assertEqual(membersById, correctMembersById)
+
+
+class mockResponse(object):
+
+	"""Mocks a successful response from the MNIS API."""
+
+	ok = True
+	content = b'\xef\xbb\xbf{"Members": {"Member": [{"@Member_Id": "172"}]}}'
+
+
+class mockErrorPageResponse(mockResponse):
+
+	"""Mocks a successful response from the MNIS API with an error page."""
+
+	content = b'<html><body>Service Unavailable</body></html>'
 
 
-class testGetIdForMember(unittest.TestCase):
+class mockSession(object):
+
+	"""
+	Mocks the mnislib session and counts the requests made with it. Each
+	request returns an instance of the session's response class.
+	"""
+
+	def __init__(self, response=mockResponse):
+
+		self.requests = 0
+		self.response = response
+
+	def get(self, url, **kwargs):
+
+		self.requests += 1
+		return self.response()
+
+
+class testGetMnisDataCache(unittest.TestCase):
+
+	"""
+	Tests getMnisData with a cache directory by mocking the session and
+	checking that a cached response is used instead of making a request,
+	and that only responses containing valid JSON are cached.
+	"""
+
+	def setUp(self):
+
+		self.realSession = mnislib.session
+		self.realCacheDirectory = mnislib.cacheDirectory
+		mnislib.session = mockSession()
+		mnislib.cacheDirectory = tempfile.mkdtemp()
+		self.data = {'Members': {'Member': [{'@Member_Id': '172'}]}}
+
+	def tearDown(self):
+
+		shutil.rmtree(mnislib.cacheDirectory)
+		mnislib.session = self.realSession
+		mnislib.cacheDirectory = self.realCacheDirectory
+
+	def testGetMnisDataCache(self):
+
+		url = mnislib.buildMnisUrl( \
+			'commonsmemberbetween=2015-05-07and2015-05-07', \
+			['Constituencies', 'Parties', 'HouseMemberships'])
+
+		# Test the first request is made and parsed without the byte order
+		# marker getting in the way
+		content = mnislib.getMnisData(url)
+		self.assertEqual(content, self.data)
+		self.assertEqual(mnislib.session.requests, 1)
+
+		# Test the second request is returned from the cache
+		content = mnislib.getMnisData(url)
+		self.assertEqual(content, self.data)
+		self.assertEqual(mnislib.session.requests, 1)
+
+		# Test an expired response is requested again
+		expiry = mnislib.cacheExpiry
+		mnislib.cacheExpiry = 0
+
+		try:
+			content = mnislib.getMnisData(url)
+		finally:
+			mnislib.cacheExpiry = expiry
+
+		self.assertEqual(content, self.data)
+		self.assertEqual(mnislib.session.requests, 2)
+
+	def testGetMnisDataCacheInvalidJson(self):
+
+		url = mnislib.buildMnisUrl( \
+			'commonsmemberbetween=2015-05-07and2015-05-07', \
+			['Constituencies', 'Parties', 'HouseMemberships'])
+
+		mnislib.session.response = mockErrorPageResponse
+
+		# Test a response that is not valid JSON raises an error, is
+		# requested each time and is never saved to the cache
+		for requests in range(1, 3):
+
+			with self.assertRaises(ValueError):
+				mnislib.getMnisData(url)
+
+			self.assertEqual(mnislib.session.requests, requests)
+
+		self.assertEqual(os.listdir(mnislib.cacheDirectory), [])
+
+
+class testGetIdForMember(downloadedDataTestCase):
 
 	"""Tests getIdForMember and checks it returns the correct id."""
 
 	def testGetIdForMember(self):
 
 		# Check first member listed alphabetically: Diane Abbott
-		g = mnislib.getIdForMember(correctMembers[0])
+		member = correctMembersByName['Abbott, Ms Diane']
+		g = mnislib.getIdForMember(member)
 		self.assertEqual(g, '172')
 
 		# Check last member listed alphabetically: Daniel Zeichner
-		g = mnislib.getIdForMember(correctMembers[649])
+		member = correctMembersByName['Zeichner, Daniel']
+		g = mnislib.getIdForMember(member)
 		self.assertEqual(g, '4382')
 
 
-class testGetListNameForMember(unittest.TestCase):
+class testGetListNameForMember(downloadedDataTestCase):
 
 	"""Tests getListNameForMember and checks it returns the correct name."""
 
 	def testGetListNameForMember(self):
 
 		# Check first member listed alphabetically: Diane Abbott
-		ln = mnislib.getListNameForMember(correctMembers[0])
+		member = correctMembersByName['Abbott, Ms Diane']
+		ln = mnislib.getListNameForMember(member)
 		self.assertEqual(ln, 'Abbott, Ms Diane')
 
 		# Check last member listed alphabetically: Daniel Zeichner
-		ln = mnislib.getListNameForMember(correctMembers[649])
+		member = correctMembersByName['Zeichner, Daniel']
+		ln = mnislib.getListNameForMember(member)
 		self.assertEqual(ln, 'Zeichner, Daniel')
 
 
-class testGetGenderForMember(unittest.TestCase):
+class testGetGenderForMember(downloadedDataTestCase):
 
 	"""Tests getGenderForMember and checks it returns the correct gender."""
 
 	def testGetGenderForMember(self):
 
 		# Check first member listed alphabetically: Diane Abbott
-		g = mnislib.getGenderForMember(correctMembers[0])
+		member = correctMembersByName['Abbott, Ms Diane']
+		g = mnislib.getGenderForMember(member)
 		self.assertEqual(g, 'F')
 
 		# Check last member listed alphabetically: Daniel Zeichner
-		g = mnislib.getGenderForMember(correctMembers[649])
+		member = correctMembersByName['Zeichner, Daniel']
+		g = mnislib.getGenderForMember(member)
 		self.assertEqual(g, 'M')
 
 
-class testGetDateOfBirthForMember(unittest.TestCase):
+class testGetDateOfBirthForMember(downloadedDataTestCase):
 
 	"""Tests getDateOfBirthForMember and checks it returns the correct DoB."""
 
 	def testGetDateOfBirthForMember(self):
 
 		# Check first member listed alphabetically: Diane Abbott
-		dob = mnislib.getDateOfBirthForMember(correctMembers[0])
+		member = correctMembersByName['Abbott, Ms Diane']
+		dob = mnislib.getDateOfBirthForMember(member)
 		d = datetime.date(1953, 9, 27)
 		self.assertEqual(dob, d)
 
 		# Check last member listed alphabetically: Daniel Zeichner
-		dob = mnislib.getDateOfBirthForMember(correctMembers[649])
+		member = correctMembersByName['Zeichner, Daniel']
+		dob = mnislib.getDateOfBirthForMember(member)
 		d = datetime.date(1956, 11, 9)
 		self.assertEqual(dob, d)
 
 
-class testGetConstituencyForMember(unittest.TestCase):
+class testGetConstituencyForMember(downloadedDataTestCase):
 
 	"""Tests getConstituencyForMember and checks it returns the correct one."""
 
 	def testGetConstituencyForMember(self):
 
 		# Set onDate to GE2015 for the latest constituency in the test data
-		d = datetime.date(2015, 5, 7)
+		d = GE2015
 
 		# Check first member listed alphabetically: Diane Abbott
-		con = mnislib.getConstituencyForMember(correctMembers[0], d)
+		member = correctMembersByName['Abbott, Ms Diane']
+		con = mnislib.getConstituencyForMember(member, d)
 		self.assertEqual(con, 'Hackney North and Stoke Newington')
 
 		# Check last member listed alphabetically: Daniel Zeichner
-		con = mnislib.getConstituencyForMember(correctMembers[649], d)
+		member = correctMembersByName['Zeichner, Daniel']
+		con = mnislib.getConstituencyForMember(member, d)
 		self.assertEqual(con, 'Cambridge')
 
 		# Check Boris Johnson for constituency as at GE2015
-		con = mnislib.getConstituencyForMember(correctMembers[319], d)
+		member = findCorrectMember('Johnson', 'Boris')
+		con = mnislib.getConstituencyForMember(member, d)
 		self.assertEqual(con, 'Uxbridge and South Ruislip')
 
 		# Check Boris Johnson for constituency as at GE2001
-		d = datetime.date(2001, 6, 7)
-		con = mnislib.getConstituencyForMember(correctMembers[319], d)
+		d = GE2001
+		member = findCorrectMember('Johnson', 'Boris')
+		con = mnislib.getConstituencyForMember(member, d)
 		self.assertEqual(con, 'Henley')
 
 
-class testGetPartyForMember(unittest.TestCase):
+class testGetPartyForMember(downloadedDataTestCase):
 
 	"""Tests getPartyForMember and checks it returns the correct one."""
 
 	def testGetPartyForMember(self):
 
 		# Set onDate to GE2015 for the latest party in the test data
-		d = datetime.date(2015, 5, 7)
+		d = GE2015
 
 		# Check first member listed alphabetically: Diane Abbott
-		p = mnislib.getPartyForMember(correctMembers[0], d)
+		member = correctMembersByName['Abbott, Ms Diane']
+		p = mnislib.getPartyForMember(member, d)
 		self.assertEqual(p, 'Labour')
 
 		# Check last member listed alphabetically: Daniel Zeichner
-		p = mnislib.getPartyForMember(correctMembers[649], d)
+		member = correctMembersByName['Zeichner, Daniel']
+		p = mnislib.getPartyForMember(member, d)
 		self.assertEqual(p, 'Labour')
 
 		# Check Douglas Carswell for party as at GE2015
-		p = mnislib.getPartyForMember(correctMembers[91], d)
+		member = findCorrectMember('Carswell', 'Douglas')
+		p = mnislib.getPartyForMember(member, d)
 		self.assertEqual(p, 'UK Independence Party')
 
 		# Check Douglas Carswell for party as at GE2010
-		d = datetime.date(2010, 5, 6)
-		p = mnislib.getPartyForMember(correctMembers[91], d)
+		d = GE2010
+		member = findCorrectMember('Carswell', 'Douglas')
+		p = mnislib.getPartyForMember(member, d)
 		self.assertEqual(p, 'Conservative')
 
 
@@ -457,26 +744,29 @@ class testIsDateInMembership(unittest.TestCase):
 			closedMembership, datetime.date(2015, 3, 31)))
 
 
-class testGetServiceDataForMember(unittest.TestCase):
+class testGetServiceDataForMember(downloadedDataTestCase):
 
 	"""Tests getServiceDataForMember and checks it returns correct data."""
 
 	def testGetServiceDataForMember(self):
 
 		# Set onDate to GE2015 to match the test data
-		d = datetime.date(2015, 5, 7)
+		d = GE2015
 
 		# Check first member listed alphabetically: Diane Abbott
-		sd = mnislib.getServiceDataForMember(correctMembers[0], d)
+		member = correctMembersByName['Abbott, Ms Diane']
+		sd = mnislib.getServiceDataForMember(member, d)
 		self.assertEqual(sd, (datetime.date(1987, 6, 11), 10035))
 
 		# Check last member listed alphabetically: Daniel Zeichner
-		sd = mnislib.getServiceDataForMember(correctMembers[649], d)
-		self.assertEqual(sd, (datetime.date(2015, 5, 7), 0))
+		member = correctMembersByName['Zeichner, Daniel']
+		sd = mnislib.getServiceDataForMember(member, d)
+		self.assertEqual(sd, (GE2015, 0))
 
 		# Check Boris Johnson as member with interrupted membership
-		sd = mnislib.getServiceDataForMember(correctMembers[319], d)
-		self.assertEqual(sd, (datetime.date(2001, 6, 7), 2530))
+		member = findCorrectMember('Johnson', 'Boris')
+		sd = mnislib.getServiceDataForMember(member, d)
+		self.assertEqual(sd, (GE2001, 2530))
 
 
 class testGetMembershipDays(unittest.TestCase):
@@ -503,6 +793,12 @@ class testGetMembershipDays(unittest.TestCase):
 		d = datetime.date(1987, 6, 10)
 		self.assertEqual(mnislib.getMembershipDays(membership, d), 0)
 
+		# Test with house dates for only the 1992 general election
+		d = datetime.date.today()
+		houseDates = {'1992': mnislib.housedata.dates['1992']}
+		days = mnislib.getMembershipDays(membership, d, houseDates=houseDates)
+		self.assertEqual(days, 10130)
+
 
 	def testGetMembershipDaysFails(self):
 
@@ -515,18 +811,46 @@ class testGetMembershipDays(unittest.TestCase):
 		# Test with an onDate after the end of the membership
 		d = datetime.date.today()
 
-		self.assertRaises(mnislib.MembershipError, \
-			mnislib.getMembershipDays, membership, d)
+		with self.assertRaises(mnislib.MembershipError):
+			mnislib.getMembershipDays(membership, d)
+
+
+class testGetDissolutionDays(unittest.TestCase):
 
+	"""Tests getDissolutionDays and checks it returns correct counts."""
 
-class testGetSummaryDataForMembers(unittest.TestCase):
+	def testGetDissolutionDays(self):
+
+		periods = mnislib.housedata.ordinalPeriods
+
+		# Test with a range covering the whole of the 2015 dissolution
+		s = datetime.date(2015, 3, 1).toordinal()
+		e = datetime.date(2015, 6, 1).toordinal()
+		self.assertEqual(mnislib.getDissolutionDays(s, e, periods), 38)
+
+		# Test with a range ending part way through the 2015 dissolution
+		e = datetime.date(2015, 4, 1).toordinal()
+		self.assertEqual(mnislib.getDissolutionDays(s, e, periods), 2)
+
+		# Test with a range starting part way through the 2015 dissolution
+		s = datetime.date(2015, 5, 1).toordinal()
+		e = datetime.date(2015, 6, 1).toordinal()
+		self.assertEqual(mnislib.getDissolutionDays(s, e, periods), 6)
+
+		# Test with a range that falls within a Parliament
+		s = datetime.date(2011, 1, 1).toordinal()
+		e = datetime.date(2014, 1, 1).toordinal()
+		self.assertEqual(mnislib.getDissolutionDays(s, e, periods), 0)
+
+
+class testGetSummaryDataForMembers(downloadedDataTestCase):
 
 	"""Tests getSummaryDataForMembers and checks it returns correct data."""
 
 	def testGetSummaryDataForMembers(self):
 
 		# Set onDate to GE2015 to match the test data
-		d = datetime.date(2015, 5, 7)
+		d = GE2015
 
 		# Get summary data
 		sd = mnislib.getSummaryDataForMembers(correctMembers, d)
@@ -549,81 +873,170 @@ class testGetSummaryDataForMembers(unittest.TestCase):
 		self.assertEqual(sd[649]['party'], 'Labour')
 		self.assertEqual(sd[649]['date_of_birth'], datetime.date(1956, 11, 9))
 		self.assertEqual(sd[649]['gender'], 'M')
-		self.assertEqual(sd[649]['first_start_date'], datetime.date(2015, 5, 7))
+		self.assertEqual(sd[649]['first_start_date'], GE2015)
 		self.assertEqual(sd[649]['days_service'], 0)
 
 
-class testSaveSummaryDataForMembers(unittest.TestCase):
+	def testGetSummaryDataForMembersWithExecutor(self):
 
-	"""Tests saveSummaryDataForMembers and checks it writes correct data."""
+		# Set onDate to GE2015 to match the test data
+		d = GE2015
+
+		# Get summary data serially and with an executor
+		sd = mnislib.getSummaryDataForMembers(correctMembers, d)
+
+		with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+			sde = mnislib.getSummaryDataForMembers( \
+				correctMembers, d, executor)
+
+		# Check the results are the same and in the same order
+		self.assertEqual(sde, sd)
 
-	def setUp(self):
+
+class testSaveSummaryDataForMembers(downloadedDataTestCase):
+
+	"""
+	Tests saveSummaryDataForMembers and checks it writes correct data. The
+	summary data is produced and saved once for the class, and the rows of
+	the csv are read once for use by each of the tests.
+	"""
+
+	@classmethod
+	def setUpClass(cls):
+
+		super().setUpClass()
 
 		# Set filename for testing
-		self.filename = "unittest.csv"
+		cls.filename = "unittest.csv"
 
 		# Set onDate to GE2015 to match the test data
-		d = datetime.date(2015, 5, 7)
+		d = GE2015
 
 		# getthe summaryData for the members
 		sd = mnislib.getSummaryDataForMembers(correctMembers, d)
 
 		# Write member data to disk as csv
-		mnislib.saveSummaryDataForMembers(sd, self.filename)
+		mnislib.saveSummaryDataForMembers(sd, cls.filename)
 
-	def tearDown(self):
+		# Read the csv once, counting the rows and keeping only the rows
+		# checked by the tests. The values in the summary data are checked in
+		# memory by the tests for getSummaryDataForMembers.
+		checkedRows = {0, 1, 650}
+		cls.rows = {}
+		cls.rowCount = 0
 
-		if os.path.exists(self.filename):
-			os.remove(self.filename)
+		with open(cls.filename, newline='') as csvFile:
+
+			for i, row in enumerate(csv.reader(csvFile)):
+
+				if i in checkedRows:
+					cls.rows[i] = row
+
+				cls.rowCount += 1
+
+	@classmethod
+	def tearDownClass(cls):
+
+		if os.path.exists(cls.filename):
+			os.remove(cls.filename)
 
 	def testSaveSummaryDataForMembers(self):
 
 		# Test if the file has been written to disk
 		self.assertTrue(os.path.exists(self.filename))
 
-		# Try reading the file in as a csv
+	def testHeader(self):
+
+		header = [ \
+			'member_id', \
+			'list_name', \
+			'constituency', \
+			'party', \
+			'date_of_birth', \
+			'gender', \
+			'first_start_date', \
+			'days_service'\
+		]
+
+		self.assertEqual(self.rows[0], header)
+
+	def testFirstMember(self):
+
+		firstMember = [ \
+			'172', \
+			'Abbott, Ms Diane', \
+			'Hackney North and Stoke Newington', \
+			'Labour', \
+			'1953-09-27', \
+			'F', \
+			'1987-06-11', \
+			'10035' \
+		]
+
+		self.assertEqual(self.rows[1], firstMember)
+
+	def testLastMember(self):
+
+		lastMember = [ \
+			'4382', \
+			'Zeichner, Daniel', \
+			'Cambridge', \
+			'Labour', \
+			'1956-11-09', \
+			'M', \
+			'2015-05-07', \
+			'0' \
+		]
+
+		self.assertEqual(self.rows[650], lastMember)
+
+	def testRowCount(self):
+
+		# Test there is a header and a row for each of the 650 members
+		self.assertEqual(self.rowCount, 651)
+
+
+class testSaveSummaryDataForMembersFails(unittest.TestCase):
+
+	"""
+	Tests saveSummaryDataForMembers leaves an existing csv unchanged when
+	producing the summary data raises an error part of the way through.
+	"""
+
+	def setUp(self):
+
+		self.directory = tempfile.mkdtemp()
+		self.filename = os.path.join(self.directory, 'unittest.csv')
+
+		with open(self.filename, 'w') as csvFile:
+			csvFile.write('existing data\n')
+
+		with open(self.filename + '.tmp', 'w') as tmpFile:
+			tmpFile.write('existing temporary data\n')
+
+	def tearDown(self):
+
+		shutil.rmtree(self.directory)
+
+	def testSaveSummaryDataForMembersFails(self):
+
+		def summaryData():
+
+			yield dict.fromkeys(mnislib.summaryFields, '')
+			raise mnislib.MembershipError("error in summary data")
+
+		with self.assertRaises(mnislib.MembershipError):
+			mnislib.saveSummaryDataForMembers(summaryData(), self.filename)
+
+		# Test the existing files are unchanged and no temporary file is left
 		with open(self.filename) as csvFile:
-			reader = csv.reader(csvFile)
-			rows = list(reader)
-
-			header = [ \
-				'member_id', \
-				'list_name', \
-				'constituency', \
-				'party', \
-				'date_of_birth', \
-				'gender', \
-				'first_start_date', \
-				'days_service'\
-			]
-
-			self.assertEqual(rows[0], header)
-
-			firstMember = [ \
-				'172', \
-				'Abbott, Ms Diane', \
-				'Hackney North and Stoke Newington', \
-				'Labour', \
-				'1953-09-27', \
-				'F', \
-				'1987-06-11', \
-				'10035' \
-			]
-
-			self.assertEqual(rows[1], firstMember)
-
-			lastMember = [ \
-				'4382', \
-				'Zeichner, Daniel', \
-				'Cambridge', \
-				'Labour', \
-				'1956-11-09', \
-				'M', \
-				'2015-05-07', \
-				'0' \
-			]
-
-			self.assertEqual(rows[650], lastMember)
+			self.assertEqual(csvFile.read(), 'existing data\n')
+
+		with open(self.filename + '.tmp') as tmpFile:
+			self.assertEqual(tmpFile.read(), 'existing temporary data\n')
+
+		self.assertEqual(sorted(os.listdir(self.directory)), \
+			['unittest.csv', 'unittest.csv.tmp'])
 
 
 class testDownloadMembers(unittest.TestCase):
@@ -668,10 +1081,44 @@ class testConvertMnisDatetime(unittest.TestCase):
 			datetime.date(2015, 5, 7), \
 		]
 
-		for i in range(len(exampleDatetimes)):
+		# Check each datetime as a separate subtest so one failure does not
+		# hide the results for the others
+		for mnisDatetime, convertedDatetime in \
+			zip(exampleDatetimes, convertedDatetimes):
+
+			with self.subTest(mnisDatetime=mnisDatetime):
+
+				d = mnislib.convertMnisDatetime(mnisDatetime)
+				self.assertEqual(d, convertedDatetime)
+
+
+	def testConvertMnisDatetimeFails(self):
+
+		# Check datetimes that are not in the MNIS format raise an error
+		for mnisDatetime in ['2015/05/07T00:00:00', '07-05-2015', '', \
+			' 015-05-07', '+015-05-07', '2_15-05-07', '2015-+5-07']:
+
+			with self.subTest(mnisDatetime=mnisDatetime):
+
+				with self.assertRaises(ValueError):
+					mnislib.convertMnisDatetime(mnisDatetime)
+
+
+	def testConvertMnisDatetimeCache(self):
+
+		mnislib.convertMnisDatetime.cache_clear()
+
+		# Check the first conversion of a datetime is a cache miss
+		d = mnislib.convertMnisDatetime('2015-05-07T00:00:00')
+		self.assertEqual(d, datetime.date(2015, 5, 7))
+		self.assertEqual(mnislib.convertMnisDatetime.cache_info().misses, 1)
+		self.assertEqual(mnislib.convertMnisDatetime.cache_info().hits, 0)
 
-			d = mnislib.convertMnisDatetime(exampleDatetimes[i])
-			self.assertEqual(d, convertedDatetimes[i])
+		# Check the second conversion of the same datetime uses the cache
+		d = mnislib.convertMnisDatetime('2015-05-07T00:00:00')
+		self.assertEqual(d, datetime.date(2015, 5, 7))
+		self.assertEqual(mnislib.convertMnisDatetime.cache_info().misses, 1)
+		self.assertEqual(mnislib.convertMnisDatetime.cache_info().hits, 1)
 
 
 class testIsDateInRange(unittest.TestCase):